@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
 """
-Run the NUMA-STREAM benchmark multiple times while logging NUMA statistics.
-
-For each run we invoke numa_stat_logger in "-r" mode so it collects data while
-the benchmark executes. The logger is started in an isolated working directory,
-which keeps each raw CSV separate. After a run finishes we append its samples
-to an aggregate CSV that includes two extra columns:
-    - mem_policy: textual description of the NUMA policy used for this run
-    - stream_run: 1-based run index so samples can be grouped later
+Turn the aggregate NUMA-STREAM log written by stream_logger.py into one row of
+features per run.
+
+Requires pandas, numpy, pyarrow and numba (the per-run kernel in _agg.py),
+e.g. in a virtualenv:
+    pip install pandas pyarrow numba
+    python3 preprocess_stream_log.py --input_csv <aggregate.csv|.parquet> \
+        --output_csv <features.csv>
+The kernel is imported from data_collection/_agg.py, next to this directory.
 """
 
 from __future__ import annotations
@@ -18,7 +19,52 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Sequence, Tuple
 import re
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# The aggregation kernel lives in data_collection/, shared by both
+# preprocessors.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from _agg import aggregate_runs, order_by_run, run_change  # noqa: E402
+
+
+# One-hot slot for every accepted spelling of a memory policy:
+# 0 = first-touch, 1 = interleave, 2 = preferred node 0, 3 = preferred node 1.
+POLICY_CODE: Dict[str, int] = {
+    "default": 0,
+    "first_touch": 0,
+    "first-touch": 0,
+    "firsttouch": 0,
+    "interleave": 1,
+    "interleave_all": 1,
+    "interleave-all": 1,
+    "preferred_node0": 2,
+    "preferred_0": 2,
+    "preferred0": 2,
+    "preferred-0": 2,
+    "preferred_node1": 3,
+    "preferred_1": 3,
+    "preferred1": 3,
+    "preferred-1": 3,
+}
+
+# Match DataFrame.to_csv output: unquoted header, strings quoted only if needed.
+CSV_WRITE_OPTIONS = pacsv.WriteOptions(
+    quoting_style='needed', quoting_header='none')
+
+
+def read_input(path: Path) -> pd.DataFrame:
+    if path.suffix == '.parquet':
+        df = pd.read_parquet(path, dtype_backend='pyarrow')
+        # mem_policy is dictionary-encoded on disk; the .str accessor needs
+        # plain strings.
+        if 'mem_policy' in df.columns:
+            df['mem_policy'] = df['mem_policy'].astype(
+                pd.ArrowDtype(pa.string()))
+        return df
+    return pd.read_csv(path, engine='pyarrow', dtype_backend='pyarrow')
 
 
 def parse_args() -> argparse.Namespace:
@@ -29,7 +75,10 @@ def parse_args() -> argparse.Namespace:
         "--input_csv",
         type=Path,
         required=True,
-        help="Path to the csv input file for the NUMA-STREAM benchmark."
+        help=(
+            "Path to the NUMA-STREAM raw log, either the aggregate CSV or "
+            "its .parquet counterpart."
+        )
     )
     parser.add_argument(
         "--output_csv",
@@ -43,104 +92,92 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> int:
     args = parse_args()
-    df = pd.read_csv(args.input_csv)
-    new_df = pd.DataFrame()
+    df = read_input(args.input_csv)
     output_csv_path = args.output_csv
 
     if 'stream_run' not in df.columns:
         raise ValueError("Input CSV is missing required 'stream_run' column")
-
-    new_df['node_0_usage'] = df['node_0_mem_used'] / df['node_0_mem_total']
-    new_df['node_1_usage'] = df['node_1_mem_used'] / df['node_1_mem_total']
-
     if 'mem_policy' not in df.columns:
         raise ValueError("Input CSV is missing required 'mem_policy' column")
-
-    policy = df['mem_policy'].astype(str).str.strip().str.lower()
-
-    first_touch_aliases = {"default",
-                           "first_touch", "first-touch", "firsttouch"}
-    interleave_aliases = {"interleave", "interleave_all", "interleave-all"}
-    preferred0_aliases = {"preferred_node0",
-                          "preferred_0", "preferred0", "preferred-0"}
-    preferred1_aliases = {"preferred_node1",
-                          "preferred_1", "preferred1", "preferred-1"}
-
-    new_df['first-touch'] = policy.isin(first_touch_aliases).astype(int)
-    new_df['interleave'] = policy.isin(interleave_aliases).astype(int)
-    new_df['preferred_0'] = policy.isin(preferred0_aliases).astype(int)
-    new_df['preferred_1'] = policy.isin(preferred1_aliases).astype(int)
-    new_df['runs'] = df['stream_run']
-
-    # Compute usage trend for each run (end usage minus beginning usage) and
-    # broadcast that per-row so downstream consumers can tell how memory moved.
-    runs = df['stream_run']
     if 'timestamp' not in df.columns:
         raise ValueError("Input CSV is missing required 'timestamp' column")
-    run_start_time = df.groupby('stream_run')['timestamp'].transform('min')
-    new_df['run_timestep'] = df['timestamp'] - run_start_time
-
-    run_usage = new_df.assign(stream_run=runs)
-    free_pages = df.groupby('stream_run').agg(
-        node_0_free_start=('node_0_nr_free_pages', 'first'),
-        node_0_free_end=('node_0_nr_free_pages', 'last'),
-        node_1_free_start=('node_1_nr_free_pages', 'first'),
-        node_1_free_end=('node_1_nr_free_pages', 'last'),
-    )
-    free_pages['node_0_free_pages_change'] = free_pages['node_0_free_end'] - \
-        free_pages['node_0_free_start']
-    free_pages['node_1_free_pages_change'] = free_pages['node_1_free_end'] - \
-        free_pages['node_1_free_start']
-
     if 'numa_pages_migrated' not in df.columns:
         raise ValueError(
             "Input CSV is missing required 'numa_pages_migrated' column")
-    migration = df.groupby('stream_run').agg(
-        migration_start=('numa_pages_migrated', 'first'),
-        migration_end=('numa_pages_migrated', 'last'),
+
+    # Usage is computed once on float32 ndarrays and reused for both the
+    # per-run statistics and the last-sample features.
+    df['node_0_usage'] = (
+        df['node_0_mem_used'].to_numpy(dtype=np.float32)
+        / df['node_0_mem_total'].to_numpy(dtype=np.float32)
     )
-    migration['total_page_migrations'] = (
-        migration['migration_end'] - migration['migration_start']
+    df['node_1_usage'] = (
+        df['node_1_mem_used'].to_numpy(dtype=np.float32)
+        / df['node_1_mem_total'].to_numpy(dtype=np.float32)
     )
 
-    trends = run_usage.groupby('stream_run').agg(
-        node_0_start=('node_0_usage', 'first'),
-        node_0_end=('node_0_usage', 'last'),
-        node_0_min_usage=('node_0_usage', 'min'),
-        node_0_max_usage=('node_0_usage', 'max'),
-        node_0_volatility=('node_0_usage', 'std'),
-        node_1_start=('node_1_usage', 'first'),
-        node_1_end=('node_1_usage', 'last'),
-        node_1_min_usage=('node_1_usage', 'min'),
-        node_1_max_usage=('node_1_usage', 'max'),
-        node_1_volatility=('node_1_usage', 'std'),
+    # Compute every per-run reduction in a single pass over the samples.
+    df = order_by_run(df, 'stream_run')
+    agg = aggregate_runs(df, 'stream_run')
+
+    # Usage trend for each run (end usage minus beginning usage) so downstream
+    # consumers can tell how memory moved.
+    agg['node_0_trend'] = agg['node_0_end'] - agg['node_0_start']
+    agg['node_1_trend'] = agg['node_1_end'] - agg['node_1_start']
+    agg['node_0_free_pages_change'] = run_change(
+        agg, 'node_0_free_start', 'node_0_free_end')
+    agg['node_1_free_pages_change'] = run_change(
+        agg, 'node_1_free_start', 'node_1_free_end')
+    agg['total_page_migrations'] = run_change(
+        agg, 'migration_start', 'migration_end')
+
+    # Only keep the last row from each run (final sample within each stream
+    # run); every remaining feature is computed on this small frame.
+    last = df.iloc[agg['last_row'].to_numpy()].reset_index(drop=True)
+
+    new_df = pd.DataFrame()
+    new_df['runs'] = last['stream_run']
+    new_df['node_0_usage'] = last['node_0_usage']
+    new_df['node_1_usage'] = last['node_1_usage']
+
+    policy = pd.Categorical(last['mem_policy'].str.strip().str.lower())
+
+    # Resolve each distinct spelling once, then index by category code. The
+    # trailing -1 catches missing values (code -1) and unknown policies.
+    slots = np.array(
+        [POLICY_CODE.get(name, -1) for name in policy.categories] + [-1],
+        dtype=np.int8,
     )
-    trends['node_0_trend'] = trends['node_0_end'] - trends['node_0_start']
-    trends['node_1_trend'] = trends['node_1_end'] - trends['node_1_start']
-    new_df['node_0_trend'] = runs.map(trends['node_0_trend'])
-    new_df['node_1_trend'] = runs.map(trends['node_1_trend'])
-
-    new_df['node_0_min_usage'] = runs.map(trends['node_0_min_usage'])
-    new_df['node_1_min_usage'] = runs.map(trends['node_1_min_usage'])
-    new_df['node_0_max_usage'] = runs.map(trends['node_0_max_usage'])
-    new_df['node_1_max_usage'] = runs.map(trends['node_1_max_usage'])
-
-    new_df['node_0_volatility'] = runs.map(trends['node_0_volatility'])
-    new_df['node_1_volatility'] = runs.map(trends['node_1_volatility'])
-
-    new_df['node_0_free_pages_change'] = runs.map(
-        free_pages['node_0_free_pages_change'])
-    new_df['node_1_free_pages_change'] = runs.map(
-        free_pages['node_1_free_pages_change'])
-
-    new_df['total_page_migrations'] = runs.map(
-        migration['total_page_migrations'])
-
-    # Only keep the last row from each run (final sample within each stream run).
-    new_df = (
-        new_df.groupby('runs', as_index=False)
-        .tail(1)
-        .reset_index(drop=True)
+    codes = slots[policy.codes]
+    new_df['first-touch'] = (codes == 0).astype('int8')
+    new_df['interleave'] = (codes == 1).astype('int8')
+    new_df['preferred_0'] = (codes == 2).astype('int8')
+    new_df['preferred_1'] = (codes == 3).astype('int8')
+
+    # agg rows are in the same run order as `last`, so align positionally
+    # instead of re-hashing the run key.
+    new_df['run_timestep'] = (
+        last['timestamp'].to_numpy() - agg['run_start_time'].to_numpy()
+    ).astype('float32')
+
+    # --- Merge in the per-run aggregates ---
+    new_df = new_df.merge(
+        agg[[
+            'node_0_trend',
+            'node_1_trend',
+            'node_0_min_usage',
+            'node_1_min_usage',
+            'node_0_max_usage',
+            'node_1_max_usage',
+            'node_0_volatility',
+            'node_1_volatility',
+            'node_0_free_pages_change',
+            'node_1_free_pages_change',
+            'total_page_migrations',
+        ]],
+        left_on='runs',
+        right_index=True,
+        how='left',
     )
 
     column_order = [
@@ -171,7 +208,11 @@ def main() -> int:
 
     print(new_df.head())
 
-    new_df.to_csv(output_csv_path, index=False)
+    pacsv.write_csv(
+        pa.Table.from_pandas(new_df, preserve_index=False),
+        str(output_csv_path),
+        write_options=CSV_WRITE_OPTIONS,
+    )
 
     return 0
 
@@ -2,10 +2,12 @@
 """
 Run the NUMA-STREAM benchmark multiple times while logging NUMA statistics.
 
-For each run we invoke numa_stat_logger in "-r" mode so it collects data while
-the benchmark executes. The logger is started in an isolated working directory,
-which keeps each raw CSV separate. After a run finishes we append its samples
-to an aggregate CSV that includes two extra columns:
+A single numa_stat_logger process is started in "--persistent" mode and told
+over stdin when each run begins and ends, so it collects data while the
+benchmark executes and writes one raw CSV per run. Logger builds without that
+mode are instead invoked per run in "-r" mode from an isolated working
+directory. After a run finishes we append its samples to an aggregate CSV that
+includes two extra columns:
     - mem_policy: textual description of the NUMA policy used for this run
     - stream_run: 1-based run index so samples can be grouped later
 """
@@ -13,12 +15,22 @@ to an aggregate CSV that includes two extra columns:
 from __future__ import annotations
 
 import argparse
+import os
 import subprocess
 import sys
+from collections import deque
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Deque, Dict, List, Optional, Sequence, TextIO, Tuple
 import re
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional; the CSV is always written.
+    pa = None
+
 
 # Map human friendly policy names to the command prefix that enforces them.
 # The default entry means "no numactl policy, inherit the current one".
@@ -28,30 +40,41 @@ POLICY_COMMANDS: Dict[str, List[str]] = {
     "preferred_node0": ["numactl", "--preferred=0"],
 }
 
-LOGGER_OUTPUT = "stream_numa_stat_log.csv"
+LOGGER_OUTPUT = "numa_stat_log.csv"
+PERSISTENT_OUTPUT = "numa_stat_log_run_{run_index}.csv"
 STREAM_HEADER = "Function      Rate (MB/s)   Avg time     Min time     Max time"
 STREAM_ROW_RE = re.compile(
-    r"^(?P<function>[A-Za-z]+):\s+"
-    r"(?P<rate>[0-9.eE+-]+)\s+"
-    r"(?P<avg>[0-9.eE+-]+)\s+"
-    r"(?P<min>[0-9.eE+-]+)\s+"
-    r"(?P<max>[0-9.eE+-]+)"
+    r"([A-Za-z]+):\s+"
+    r"([0-9.eE+-]+)\s+"
+    r"([0-9.eE+-]+)\s+"
+    r"([0-9.eE+-]+)\s+"
+    r"([0-9.eE+-]+)"
 )
 STREAM_FUNCTIONS = ("Copy", "Scale", "Add", "Triad")
+SANITIZE_RE = re.compile(r"[^A-Za-z0-9_-]+")
+IO_BUFFER_SIZE = 1 << 20
+STDOUT_TAIL_LINES = 512
+
+STREAM_RESULTS_HEADER = ",".join(
+    ["stream_run", "mem_policy"]
+    + [
+        f"{fn.lower()}_{metric}"
+        for fn in STREAM_FUNCTIONS
+        for metric in ("rate_mb_s", "avg_time_s", "min_time_s", "max_time_s")
+    ]
+)
+
+# (function, rate MB/s, avg time, min time, max time)
+StreamRow = Tuple[str, float, float, float, float]
 
 
 def normalize_policies(raw: Sequence[str]) -> List[str]:
-    policies: List[str] = []
-    for entry in raw:
-        for token in entry.split(","):
-            token = token.strip()
-            if token:
-                policies.append(token)
-    return policies or ["default"]
+    tokens = (token.strip() for token in ",".join(raw).split(","))
+    return [token for token in tokens if token] or ["default"]
 
 
 def sanitize_label(value: str) -> str:
-    sanitized = re.sub(r"[^A-Za-z0-9_-]+", "_", value).strip("_")
+    sanitized = SANITIZE_RE.sub("_", value).strip("_")
     return sanitized or "policy"
 
 
@@ -153,6 +176,85 @@ def ensure_binaries(stream_path: Path, logger_path: Path) -> None:
         )
 
 
+class PersistentLogger:
+    """
+    A single numa_stat_logger process reused for every run of a sweep.
+
+    The logger is started with --persistent and driven over its stdin with
+    "run <id>" / "end" commands. Each command is acknowledged on stdout, so a
+    run's CSV is complete once end() returns.
+    """
+
+    def __init__(self, proc: subprocess.Popen, output_dir: Path) -> None:
+        self._proc = proc
+        self._output_dir = output_dir
+
+    @classmethod
+    def start(
+        cls,
+        logger_path: Path,
+        numa_count: int,
+        interval: float,
+        output_dir: Path,
+    ) -> Optional[PersistentLogger]:
+        """Start the logger, or return None if it lacks --persistent."""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        proc = subprocess.Popen(
+            [str(logger_path), str(numa_count), str(interval), "--persistent"],
+            cwd=output_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        if proc.stdout.readline().strip() != "ready":
+            proc.stdin.close()
+            proc.stdout.close()
+            proc.wait()
+            return None
+        return cls(proc, output_dir)
+
+    def _send(self, command: str) -> None:
+        self._proc.stdin.write(command + "\n")
+        self._proc.stdin.flush()
+        reply = self._proc.stdout.readline().strip()
+        if reply != "ok":
+            raise RuntimeError(
+                f"numa_stat_logger rejected {command!r}: {reply or 'exited'}"
+            )
+
+    def begin(self, run_index: int) -> Path:
+        self._send(f"run {run_index}")
+        return self._output_dir / PERSISTENT_OUTPUT.format(run_index=run_index)
+
+    def end(self) -> None:
+        self._send("end")
+
+    def close(self) -> None:
+        self._proc.stdin.close()
+        self._proc.stdout.close()
+        self._proc.wait()
+
+
+def run_and_tail(cmd: Sequence[str], cwd: Path) -> str:
+    # Echo the benchmark output as it arrives but only retain its tail: the
+    # STREAM summary table is printed last. stderr goes straight through.
+    tail: Deque[str] = deque(maxlen=STDOUT_TAIL_LINES)
+    with subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    ) as proc:
+        for line in proc.stdout:
+            sys.stdout.write(line)
+            tail.append(line)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return "".join(tail)
+
+
 def run_once(
     run_index: int,
     policy_name: str,
@@ -161,10 +263,24 @@ def run_once(
     stream_path: Path,
     logger_path: Path,
     run_dir: Path,
+    persistent: Optional[PersistentLogger] = None,
 ) -> Tuple[Path, str]:
     run_dir.mkdir(parents=True, exist_ok=True)
     stream_cmd = [str(stream_path)]
 
+    print(
+        f"[run {run_index}] policy={policy_name} -> collecting NUMA stats ...",
+        flush=True,
+    )
+
+    if persistent is not None:
+        run_csv = persistent.begin(run_index)
+        try:
+            stream_stdout = run_and_tail(stream_cmd, run_dir)
+        finally:
+            persistent.end()
+        return run_csv, stream_stdout
+
     logger_cmd = [
         str(logger_path),
         str(numa_count),
@@ -172,89 +288,142 @@ def run_once(
         "-r",
         *stream_cmd,
     ]
+    return run_dir / LOGGER_OUTPUT, run_and_tail(logger_cmd, run_dir)
 
-    print(
-        f"[run {run_index}] policy={policy_name} -> collecting NUMA stats ...",
-        flush=True,
-    )
-    result = subprocess.run(
-        logger_cmd,
-        check=True,
-        cwd=run_dir,
-        capture_output=True,
-        text=True,
-    )
-    if result.stdout:
-        print(result.stdout, end="")
-    if result.stderr:
-        print(result.stderr, file=sys.stderr, end="")
-    return run_dir / LOGGER_OUTPUT, result.stdout or ""
+
+def open_for_append(path: Path) -> Tuple[TextIO, str]:
+    """Open ``path`` for appending and return it with its current header."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fh = path.open("a+", encoding="utf-8", buffering=IO_BUFFER_SIZE)
+    fh.seek(0)
+    header = fh.readline().rstrip("\n")
+    fh.seek(0, os.SEEK_END)
+    return fh, header
+
+
+def ensure_header(
+    dest: TextIO, existing: str, expected: str, label: str
+) -> None:
+    if not existing:
+        dest.write(expected + "\n")
+    elif existing != expected:
+        raise RuntimeError(
+            f"{label} header mismatch.\n"
+            f"Existing: {existing}\nExpected: {expected}"
+        )
 
 
 def append_with_metadata(
     run_csv: Path,
-    aggregate_csv: Path,
-    policy_name: str,
+    dest: TextIO,
+    dest_header: str,
+    tail: str,
     run_index: int,
-) -> None:
+) -> str:
+    """
+    Append the samples of ``run_csv`` to the open aggregate ``dest``.
+
+    ``tail`` is the ",<policy>,<run>" suffix added to every row. Returns the
+    aggregate header in effect afterwards so callers validate it only once.
+    """
     if not run_csv.is_file():
         raise FileNotFoundError(f"Expected logger output at {run_csv}")
 
-    raw_lines = run_csv.read_text(encoding="utf-8").strip().splitlines()
-    if not raw_lines:
-        print(f"[run {run_index}] warning: {run_csv} is empty, skipping.")
-        return
-
-    base_header = raw_lines[0]
-    rows = raw_lines[1:]
-    augmented_header = f"{base_header},mem_policy,stream_run"
-
-    aggregate_csv.parent.mkdir(parents=True, exist_ok=True)
-    if not aggregate_csv.exists():
-        aggregate_csv.write_text(augmented_header + "\n", encoding="utf-8")
-    else:
-        with aggregate_csv.open("r", encoding="utf-8") as existing:
-            existing_header = existing.readline().rstrip("\n")
-        if existing_header != augmented_header:
-            raise RuntimeError(
-                f"Aggregate header mismatch.\n"
-                f"Existing: {existing_header}\nExpected: {augmented_header}"
-            )
-
-    with aggregate_csv.open("a", encoding="utf-8") as dest:
-        for row in rows:
-            dest.write(f"{row},{policy_name},{run_index}\n")
+    with run_csv.open("r", encoding="utf-8", buffering=IO_BUFFER_SIZE) as src:
+        base_header = next(src, "").strip()
+        if not base_header:
+            print(f"[run {run_index}] warning: {run_csv} is empty, skipping.")
+            return dest_header
+        augmented_header = f"{base_header},mem_policy,stream_run"
+        if augmented_header != dest_header:
+            ensure_header(dest, dest_header, augmented_header, "Aggregate")
+
+        dest.writelines(
+            row.rstrip("\n") + tail for row in src if row != "\n"
+        )
+    return augmented_header
 
 
-def parse_stream_results(stream_output: str) -> List[Dict[str, float]]:
+def write_run_parquet(
+    run_csv: Path,
+    parquet_path: Path,
+    policy_name: str,
+    run_index: int,
+) -> bool:
+    """
+    Write the samples of ``run_csv`` to ``parquet_path``.
+
+    Same rows as the aggregate CSV, but columnar and with mem_policy
+    dictionary-encoded so preprocessing skips the float->str->float trip.
+    Column types are fixed rather than inferred so every part shares one
+    schema. Returns False, writing nothing, for an empty or header-only run.
+    """
+    with run_csv.open("r", encoding="utf-8") as src:
+        names = src.readline().strip().split(",")
+    if not names[0]:
+        return False
+    column_types = {
+        name: pa.float64() if name == "timestamp" else pa.int64()
+        for name in names
+    }
+    table = pacsv.read_csv(
+        run_csv,
+        convert_options=pacsv.ConvertOptions(column_types=column_types),
+    )
+    n_rows = table.num_rows
+    if not n_rows:
+        return False
+    table = table.append_column(
+        "mem_policy",
+        pa.DictionaryArray.from_arrays(
+            pa.array([0] * n_rows, pa.int8()), [policy_name]
+        ),
+    )
+    table = table.append_column(
+        "stream_run", pa.array([run_index] * n_rows, pa.int64())
+    )
+    pq.write_table(table, parquet_path)
+    return True
+
+
+def combine_parquet(parts: Sequence[Path], dest: Path) -> None:
+    # Like the aggregate CSV, dest accumulates across sweeps: rows already
+    # in it come first, then this sweep's parts.
+    sources = ([dest] if dest.exists() else []) + list(parts)
+    schema = pq.read_schema(parts[0])
+    tmp = dest.with_name(dest.name + ".tmp")
+    with pq.ParquetWriter(tmp, schema) as writer:
+        for source in sources:
+            writer.write_table(pq.read_table(source, schema=schema))
+    os.replace(tmp, dest)
+    # The parts are only staging copies of rows now held in dest.
+    for part in parts:
+        part.unlink()
+
+
+def parse_stream_results(stream_output: str) -> List[StreamRow]:
     lines = [line.strip() for line in stream_output.splitlines()]
     try:
         start_idx = lines.index(STREAM_HEADER) + 1
     except ValueError:
         return []
 
-    rows: List[Dict[str, float]] = []
+    match_row = STREAM_ROW_RE.match
+    rows: List[StreamRow] = []
     for line in lines[start_idx:]:
         if not line or line.startswith("-"):
             break
-        match = STREAM_ROW_RE.match(line)
+        match = match_row(line)
         if not match:
             continue
-        rows.append(
-            {
-                "function": match.group("function"),
-                "rate": float(match.group("rate")),
-                "avg": float(match.group("avg")),
-                "min": float(match.group("min")),
-                "max": float(match.group("max")),
-            }
-        )
+        fn, rate, avg, mn, mx = match.groups()
+        rows.append((fn, float(rate), float(avg), float(mn), float(mx)))
     return rows
 
 
 def append_stream_results(
-    results: Sequence[Dict[str, float]],
-    csv_path: Path,
+    results: Sequence[StreamRow],
+    dest: TextIO,
     policy_name: str,
     run_index: int,
 ) -> None:
@@ -262,20 +431,7 @@ def append_stream_results(
         print(f"[run {run_index}] warning: STREAM output missing summary table.")
         return
 
-    header_parts = ["stream_run", "mem_policy"]
-    for fn in STREAM_FUNCTIONS:
-        prefix = fn.lower()
-        header_parts.extend(
-            [
-                f"{prefix}_rate_mb_s",
-                f"{prefix}_avg_time_s",
-                f"{prefix}_min_time_s",
-                f"{prefix}_max_time_s",
-            ]
-        )
-    header = ",".join(header_parts)
-
-    row_by_function = {row["function"]: row for row in results}
+    row_by_function = {row[0]: row for row in results}
     missing = [fn for fn in STREAM_FUNCTIONS if fn not in row_by_function]
     if missing:
         print(
@@ -283,35 +439,23 @@ def append_stream_results(
             f"{', '.join(missing)}"
         )
 
-    csv_path.parent.mkdir(parents=True, exist_ok=True)
-    if not csv_path.exists():
-        csv_path.write_text(header + "\n", encoding="utf-8")
-    else:
-        with csv_path.open("r", encoding="utf-8") as fh:
-            existing_header = fh.readline().rstrip("\n")
-        if existing_header != header:
-            raise RuntimeError(
-                f"STREAM metrics header mismatch.\n"
-                f"Existing: {existing_header}\nExpected: {header}"
-            )
-
     row_values: List[str] = [str(run_index), policy_name]
     for fn in STREAM_FUNCTIONS:
         row = row_by_function.get(fn)
         if not row:
             row_values.extend(["", "", "", ""])
             continue
+        _, rate, avg, mn, mx = row
         row_values.extend(
             [
-                f"{row['rate']:.6f}",
-                f"{row['avg']:.9f}",
-                f"{row['min']:.9f}",
-                f"{row['max']:.9f}",
+                f"{rate:.6f}",
+                f"{avg:.9f}",
+                f"{mn:.9f}",
+                f"{mx:.9f}",
             ]
         )
 
-    with csv_path.open("a", encoding="utf-8") as fh:
-        fh.write(",".join(row_values) + "\n")
+    dest.write(",".join(row_values) + "\n")
 
 
 def main() -> int:
@@ -335,25 +479,80 @@ def main() -> int:
         flush=True,
     )
 
-    for offset in range(args.runs):
-        run_index = args.start_run + offset
-        policy_name = policies[(run_index - 1) % len(policies)]
-        run_dir = args.output_dir / f"run_{run_index:02d}"
-        run_csv_path, stream_stdout = run_once(
-            run_index,
-            policy_name,
-            args.interval,
-            numa_nodes,
-            args.stream_binary.resolve(),
-            args.logger_binary.resolve(),
-            run_dir,
+    # Both output files stay open for the whole sweep; headers are checked
+    # once here instead of on every run.
+    parquet_parts: List[Path] = []
+    with ExitStack() as stack:
+        aggregate_fh, aggregate_header = open_for_append(aggregate_file)
+        stack.enter_context(aggregate_fh)
+        results_fh, results_header = open_for_append(stream_results_file)
+        stack.enter_context(results_fh)
+        ensure_header(
+            results_fh, results_header, STREAM_RESULTS_HEADER, "STREAM metrics"
         )
-        append_with_metadata(run_csv_path, aggregate_file,
-                             policy_name, run_index)
-        stream_results = parse_stream_results(stream_stdout)
-        append_stream_results(
-            stream_results, stream_results_file, policy_name, run_index
+
+        # One logger process serves every run when the binary supports it;
+        # older builds fall back to spawning the logger per run.
+        persistent = PersistentLogger.start(
+            args.logger_binary.resolve(),
+            numa_nodes,
+            args.interval,
+            args.output_dir,
         )
+        if persistent is None:
+            print("numa_stat_logger lacks --persistent; spawning it per run.")
+        else:
+            stack.callback(persistent.close)
+
+        # Runs already appended to the CSV reach the Parquet file too, even
+        # when a later run fails.
+        parquet_file = aggregate_file.with_suffix(".parquet")
+
+        def finish_parquet() -> None:
+            if parquet_parts:
+                combine_parquet(parquet_parts, parquet_file)
+                print(f"Aggregated Parquet: {parquet_file}")
+
+        stack.callback(finish_parquet)
+
+        for offset in range(args.runs):
+            run_index = args.start_run + offset
+            policy_name = policies[(run_index - 1) % len(policies)]
+            run_dir = args.output_dir / f"run_{run_index:02d}"
+            run_csv_path, stream_stdout = run_once(
+                run_index,
+                policy_name,
+                args.interval,
+                numa_nodes,
+                args.stream_binary.resolve(),
+                args.logger_binary.resolve(),
+                run_dir,
+                persistent,
+            )
+            # The Parquet part is written first and only counted once the
+            # same rows are in the CSV, so both aggregates hold the same runs.
+            parquet_part = run_dir / f"run_{run_index}.parquet"
+            has_part = (
+                pa is not None
+                and run_csv_path.is_file()
+                and write_run_parquet(
+                    run_csv_path, parquet_part, policy_name, run_index)
+            )
+            aggregate_header = append_with_metadata(
+                run_csv_path,
+                aggregate_fh,
+                aggregate_header,
+                f",{policy_name},{run_index}\n",
+                run_index,
+            )
+            aggregate_fh.flush()
+            if has_part:
+                parquet_parts.append(parquet_part)
+            stream_results = parse_stream_results(stream_stdout)
+            append_stream_results(
+                stream_results, results_fh, policy_name, run_index
+            )
+            results_fh.flush()
 
     print(f"All runs complete. Aggregated CSV: {aggregate_file}")
     return 0
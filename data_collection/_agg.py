@@ -0,0 +1,183 @@
+"""
+Per-run aggregation kernel shared by the STREAM and rocksdb preprocessing
+scripts, which add this directory to sys.path to import it.
+
+The raw logger CSV holds many samples per run. Instead of issuing one pandas
+groupby reduction per feature, rows are ordered so every run is contiguous and
+a single jitted loop emits all first/last/min/max/std reductions at once.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+
+def order_by_run(df: pd.DataFrame, run_col: str) -> pd.DataFrame:
+    # Runs are appended in order by the loggers, so this is normally a no-op.
+    # A stable sort keeps the sample order inside each run intact.
+    if df[run_col].is_monotonic_increasing:
+        return df
+    return df.sort_values(run_col, kind='stable').reset_index(drop=True)
+
+
+@njit(cache=True)
+def run_aggregates(run_id, ts, n0u, n1u, n0_free, n1_free, mig):
+    n_rows = run_id.shape[0]
+    n_runs = run_id[n_rows - 1] + 1 if n_rows else 0
+
+    ts_min = np.empty(n_runs)
+    u_first = np.empty((2, n_runs), n0u.dtype)
+    u_last = np.empty((2, n_runs), n0u.dtype)
+    u_min = np.empty((2, n_runs), n0u.dtype)
+    u_max = np.empty((2, n_runs), n0u.dtype)
+    u_std = np.empty((2, n_runs), n0u.dtype)
+    free_first = np.empty((2, n_runs), n0_free.dtype)
+    free_last = np.empty((2, n_runs), n0_free.dtype)
+    mig_first = np.empty(n_runs, mig.dtype)
+    mig_last = np.empty(n_runs, mig.dtype)
+
+    # Missing samples (NaN) are skipped like the pandas reductions this
+    # replaces: each column's first/last/min/max/std only sees valid values
+    # and stays NaN for a run that has none. x == x is False only for NaN.
+    mean = np.zeros(2)
+    m2 = np.zeros(2)
+    count = np.zeros(2, np.int64)
+    free_seen = np.zeros(2, np.bool_)
+    mig_seen = False
+    for i in range(n_rows):
+        r = run_id[i]
+        if i == 0 or r != run_id[i - 1]:
+            # First sample of a new run.
+            count[:] = 0
+            mean[:] = 0.0
+            m2[:] = 0.0
+            ts_min[r] = ts[i]
+            for k in range(2):
+                x = n0u[i] if k == 0 else n1u[i]
+                u_first[k, r] = x
+                u_last[k, r] = x
+                u_min[k, r] = x
+                u_max[k, r] = x
+                u_std[k, r] = np.nan
+                f = n0_free[i] if k == 0 else n1_free[i]
+                free_first[k, r] = f
+                free_last[k, r] = f
+                free_seen[k] = f == f
+            mig_first[r] = mig[i]
+            mig_last[r] = mig[i]
+            mig_seen = mig[i] == mig[i]
+
+        if ts[i] < ts_min[r] or ts_min[r] != ts_min[r]:
+            ts_min[r] = ts[i]
+        for k in range(2):
+            x = n0u[i] if k == 0 else n1u[i]
+            if x == x:
+                count[k] += 1
+                if count[k] == 1:
+                    u_first[k, r] = x
+                    u_min[k, r] = x
+                    u_max[k, r] = x
+                elif x < u_min[k, r]:
+                    u_min[k, r] = x
+                elif x > u_max[k, r]:
+                    u_max[k, r] = x
+                # Welford's running mean/M2 for the sample standard deviation.
+                delta = x - mean[k]
+                mean[k] += delta / count[k]
+                m2[k] += delta * (x - mean[k])
+                u_last[k, r] = x
+                if count[k] > 1:
+                    u_std[k, r] = np.sqrt(m2[k] / (count[k] - 1))
+
+            f = n0_free[i] if k == 0 else n1_free[i]
+            if f == f:
+                if not free_seen[k]:
+                    free_first[k, r] = f
+                    free_seen[k] = True
+                free_last[k, r] = f
+
+        if mig[i] == mig[i]:
+            if not mig_seen:
+                mig_first[r] = mig[i]
+                mig_seen = True
+            mig_last[r] = mig[i]
+
+    return (
+        ts_min,
+        u_first, u_last, u_min, u_max, u_std,
+        free_first, free_last,
+        mig_first, mig_last,
+    )
+
+
+def aggregate_runs(df: pd.DataFrame, run_col: str) -> pd.DataFrame:
+    """
+    Aggregate samples per run with a single pass over ``df``.
+
+    ``df`` must already be ordered by ``run_col`` (see ``order_by_run``) and
+    carry ``node_0_usage``/``node_1_usage`` columns. The result is indexed by
+    run and includes ``last_row``, the position of each run's final sample.
+    """
+    runs = df[run_col].to_numpy()
+    # A run ends wherever the next row's key differs, and at the final row.
+    run_end = np.empty(runs.shape[0], dtype=bool)
+    if runs.shape[0]:
+        np.not_equal(runs[1:], runs[:-1], out=run_end[:-1])
+        run_end[-1] = True
+    last_row = np.flatnonzero(run_end)
+    run_id = np.cumsum(run_end) - run_end
+
+    (
+        ts_min,
+        u_first, u_last, u_min, u_max, u_std,
+        free_first, free_last,
+        mig_first, mig_last,
+    ) = run_aggregates(
+        run_id,
+        df['timestamp'].to_numpy(),
+        df['node_0_usage'].to_numpy(),
+        df['node_1_usage'].to_numpy(),
+        df['node_0_nr_free_pages'].to_numpy(),
+        df['node_1_nr_free_pages'].to_numpy(),
+        df['numa_pages_migrated'].to_numpy(),
+    )
+
+    return pd.DataFrame(
+        {
+            'last_row': last_row,
+            'run_start_time': ts_min,
+            'node_0_free_start': free_first[0],
+            'node_0_free_end': free_last[0],
+            'node_1_free_start': free_first[1],
+            'node_1_free_end': free_last[1],
+            'migration_start': mig_first,
+            'migration_end': mig_last,
+            'node_0_start': u_first[0],
+            'node_0_end': u_last[0],
+            'node_0_min_usage': u_min[0],
+            'node_0_max_usage': u_max[0],
+            'node_0_volatility': u_std[0],
+            'node_1_start': u_first[1],
+            'node_1_end': u_last[1],
+            'node_1_min_usage': u_min[1],
+            'node_1_max_usage': u_max[1],
+            'node_1_volatility': u_std[1],
+        },
+        index=pd.Index(runs[last_row], name=run_col),
+    )
+
+
+def run_change(agg: pd.DataFrame, start_col: str, end_col: str) -> pd.Series:
+    """
+    Per-run ``end_col - start_col`` from ``aggregate_runs`` output.
+
+    Counter deltas fit in int32 and are stored that way, unless some run had
+    no valid sample for the counter: that run stays NaN (as the pandas groupby
+    reductions left it) and the column stays float.
+    """
+    change = agg[end_col] - agg[start_col]
+    if change.notna().all():
+        return change.astype('int32')
+    return change
@@ -18,13 +18,20 @@ fi
 # Define the path to the db_bench executable
 DB_BENCH_EXEC=~/rocksdb/db_bench
 
+# 3. Database directory (defaults to db_bench's own /tmp location)
+# rocksdb_logger.py sets DB_BENCH_DB so concurrent runs don't share a database.
+DB_ARGS=()
+if [ -n "${DB_BENCH_DB:-}" ]; then
+    DB_ARGS=(--db="$DB_BENCH_DB")
+fi
+
 echo "--- Running RocksDB Benchmarks ---"
 echo "NUM Operations (--num): $NUM"
 echo "Threads (--threads): $THREADS"
 echo "----------------------------------"
 
 # Execute the db_bench command with dynamic parameters
-$DB_BENCH_EXEC \
+$DB_BENCH_EXEC "${DB_ARGS[@]}" \
     --num_levels=6 --key_size=20 \
     --prefix_size=20 --keys_per_prefix=0 --value_size=100 \
     --cache_size=17179869184 --cache_numshardbits=6 \
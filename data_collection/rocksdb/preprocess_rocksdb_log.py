@@ -3,13 +3,46 @@
 from __future__ import annotations
 
 import argparse
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from pathlib import Path
 import re
 import subprocess
 import sys
 from typing import Dict, List, Sequence, Tuple
 
+# The aggregation kernel lives in data_collection/, shared by both
+# preprocessors.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from _agg import aggregate_runs, order_by_run, run_change  # noqa: E402
+
+
+# One-hot slot for every accepted spelling of a memory policy:
+# 0 = first-touch, 1 = interleave, 2 = preferred node 0, 3 = preferred node 1.
+POLICY_CODE: Dict[str, int] = {
+    "default": 0,
+    "first_touch": 0,
+    "first-touch": 0,
+    "firsttouch": 0,
+    "interleave": 1,
+    "interleave_all": 1,
+    "interleave-all": 1,
+    "preferred_node0": 2,
+    "preferred_0": 2,
+    "preferred0": 2,
+    "preferred-0": 2,
+    "preferred_node1": 3,
+    "preferred_1": 3,
+    "preferred1": 3,
+    "preferred-1": 3,
+}
+
+# Match DataFrame.to_csv output: unquoted header, strings quoted only if needed.
+CSV_WRITE_OPTIONS = pacsv.WriteOptions(
+    quoting_style='needed', quoting_header='none')
+
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
@@ -35,7 +68,8 @@ def main() -> int:
     args = parse_args()
 
     # Read input
-    df = pd.read_csv(args.input_csv)
+    df = pd.read_csv(
+        args.input_csv, engine='pyarrow', dtype_backend='pyarrow')
 
     # Validate required columns early
     required = ['run_index', 'mem_policy', 'timestamp']
@@ -44,85 +78,87 @@ def main() -> int:
             raise ValueError(f"Input CSV is missing required '{col}' column")
 
     # Normalize policy names
-    policy = df['mem_policy'].astype(str).str.strip().str.lower()
+    policy = pd.Categorical(df['mem_policy'].str.strip().str.lower())
 
     # --- One-hot encode memory policies ---
-    first_touch_aliases = {"default",
-                           "first_touch", "first-touch", "firsttouch"}
-    interleave_aliases = {"interleave", "interleave_all", "interleave-all"}
-    preferred0_aliases = {"preferred_node0",
-                          "preferred_0", "preferred0", "preferred-0"}
-    preferred1_aliases = {"preferred_node1",
-                          "preferred_1", "preferred1", "preferred-1"}
-
     # Prepare 1-hot columns at full df resolution
     # Take only the last row per run later.
-    df['first-touch'] = policy.isin(first_touch_aliases).astype(int)
-    df['interleave'] = policy.isin(interleave_aliases).astype(int)
-    df['preferred_0'] = policy.isin(preferred0_aliases).astype(int)
-    df['preferred_1'] = policy.isin(preferred1_aliases).astype(int)
-
-    # --- Compute per-run aggregates once ---
-    # Usage trends and statistics
-    usage_temp = pd.DataFrame()
-    usage_temp['node_0_usage'] = df['node_0_mem_used'] / df['node_0_mem_total']
-    usage_temp['node_1_usage'] = df['node_1_mem_used'] / df['node_1_mem_total']
-    usage_temp['run_index'] = df['run_index']
-
-    trends = usage_temp.groupby('run_index').agg(
-        node_0_start=('node_0_usage', 'first'),
-        node_0_end=('node_0_usage', 'last'),
-        node_0_min_usage=('node_0_usage', 'min'),
-        node_0_max_usage=('node_0_usage', 'max'),
-        node_0_volatility=('node_0_usage', 'std'),
-        node_1_start=('node_1_usage', 'first'),
-        node_1_end=('node_1_usage', 'last'),
-        node_1_min_usage=('node_1_usage', 'min'),
-        node_1_max_usage=('node_1_usage', 'max'),
-        node_1_volatility=('node_1_usage', 'std'),
-    )
-
-    trends['node_0_trend'] = trends['node_0_end'] - trends['node_0_start']
-    trends['node_1_trend'] = trends['node_1_end'] - trends['node_1_start']
-
-    # Free pages change
-    free_pages = df.groupby('run_index').agg(
-        node_0_free_start=('node_0_nr_free_pages', 'first'),
-        node_0_free_end=('node_0_nr_free_pages', 'last'),
-        node_1_free_start=('node_1_nr_free_pages', 'first'),
-        node_1_free_end=('node_1_nr_free_pages', 'last'),
-    )
-
-    free_pages['node_0_free_pages_change'] = (
-        free_pages['node_0_free_end'] - free_pages['node_0_free_start']
-    )
-    free_pages['node_1_free_pages_change'] = (
-        free_pages['node_1_free_end'] - free_pages['node_1_free_start']
+    # Resolve each distinct spelling once, then index by category code. The
+    # trailing -1 catches missing values (code -1) and unknown policies.
+    slots = np.array(
+        [POLICY_CODE.get(name, -1) for name in policy.categories] + [-1],
+        dtype=np.int8,
     )
+    unmapped = [
+        name for name, slot in zip(policy.categories, slots) if slot < 0]
+    if unmapped:
+        # e.g. bind_node<N> from rocksdb_logger.py --parallel-nodes: those
+        # runs get all-zero policy features, like an unknown policy would.
+        print(
+            "warning: no policy one-hot encoding for mem_policy "
+            f"{', '.join(unmapped)}; these runs get all-zero policy columns.",
+            file=sys.stderr,
+        )
+    codes = slots[policy.codes]
+    df['first-touch'] = (codes == 0).astype('int8')
+    df['interleave'] = (codes == 1).astype('int8')
+    df['preferred_0'] = (codes == 2).astype('int8')
+    df['preferred_1'] = (codes == 3).astype('int8')
 
     # Total migration
     if 'numa_pages_migrated' not in df.columns:
         raise ValueError(
             "Input CSV is missing required 'numa_pages_migrated' column")
 
-    migration = df.groupby('run_index').agg(
-        migration_start=('numa_pages_migrated', 'first'),
-        migration_end=('numa_pages_migrated', 'last'),
+    # --- Compute per-run aggregates once ---
+    # Usage is computed once on float32 ndarrays and reused for both the
+    # per-run statistics and the last-sample features.
+    df['node_0_usage'] = (
+        df['node_0_mem_used'].to_numpy(dtype=np.float32)
+        / df['node_0_mem_total'].to_numpy(dtype=np.float32)
     )
-    migration['total_page_migrations'] = (
-        migration['migration_end'] - migration['migration_start']
+    df['node_1_usage'] = (
+        df['node_1_mem_used'].to_numpy(dtype=np.float32)
+        / df['node_1_mem_total'].to_numpy(dtype=np.float32)
     )
 
-    # --- Extract only the last row per run ---
-    last = df.groupby('run_index').tail(1).reset_index(drop=True)
+    df = order_by_run(df, 'run_index')
+    agg = aggregate_runs(df, 'run_index')
 
-    # Compute last-sample usage
-    last['node_0_usage'] = last['node_0_mem_used'] / last['node_0_mem_total']
-    last['node_1_usage'] = last['node_1_mem_used'] / last['node_1_mem_total']
+    # Usage trends and statistics
+    trends = agg[[
+        'node_0_min_usage',
+        'node_0_max_usage',
+        'node_0_volatility',
+        'node_1_min_usage',
+        'node_1_max_usage',
+        'node_1_volatility',
+    ]].copy()
+    trends['node_0_trend'] = agg['node_0_end'] - agg['node_0_start']
+    trends['node_1_trend'] = agg['node_1_end'] - agg['node_1_start']
+
+    # Free pages change
+    free_pages = pd.DataFrame({
+        'node_0_free_pages_change':
+            run_change(agg, 'node_0_free_start', 'node_0_free_end'),
+        'node_1_free_pages_change':
+            run_change(agg, 'node_1_free_start', 'node_1_free_end'),
+    })
+
+    migration = pd.DataFrame({
+        'total_page_migrations':
+            run_change(agg, 'migration_start', 'migration_end'),
+    })
+
+    # --- Extract only the last row per run ---
+    last = df.iloc[agg['last_row'].to_numpy()].reset_index(drop=True)
 
     # Compute run_timestep: last timestamp minus start timestamp
-    run_start = df.groupby('run_index')['timestamp'].min()
-    last['run_timestep'] = last['timestamp'] - last['run_index'].map(run_start)
+    # agg rows are in the same run order as `last`, so align positionally
+    # instead of re-hashing the run key.
+    last['run_timestep'] = (
+        last['timestamp'].to_numpy() - agg['run_start_time'].to_numpy()
+    ).astype('float32')
 
     # --- Merge in the per-run aggregates ---
     out = last.merge(trends, on='run_index', how='left')
@@ -164,7 +200,11 @@ def main() -> int:
 
     print(out.head())
 
-    out.to_csv(args.output_csv, index=False)
+    pacsv.write_csv(
+        pa.Table.from_pandas(out, preserve_index=False),
+        str(args.output_csv),
+        write_options=CSV_WRITE_OPTIONS,
+    )
     return 0
 
 
@@ -3,14 +3,20 @@
 from __future__ import annotations
 
 import argparse
-import math
+import gzip
+import logging
+import mmap
 import os
 from pathlib import Path
 import re
 import subprocess
 import sys
-from typing import Dict, List, Sequence, Tuple
-from venv import logger
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
 
 POLICY_COMMANDS: Dict[str, List[str]] = {
     "default": [],
@@ -19,6 +25,11 @@ POLICY_COMMANDS: Dict[str, List[str]] = {
 }
 
 LOGGER_OUTPUT = "numa_stat_log.csv"
+BENCH_OUTPUT = "db_bench.out"
+# db_bench prints its summary lines last; with stats reporting disabled in
+# benchmark_script.sh they fit well inside this window.
+BENCH_OUTPUT_TAIL = 1 << 16
+FLUSH_THRESHOLD = 1 << 16
 ROCKS_DB_FUNCTIONS = (
     "fillrandom", "readseq", "readrandom", "readtocache", "readwhilescanning"
 )
@@ -27,6 +38,23 @@ ROCKS_DB_ROW_RE = re.compile(
     r"(?P<avg>[\d\.]+)\s+micros/op\s+"
     r"(?P<rate>[\d\.]+)\s+ops/sec.*"
 )
+ROCKS_DB_FN_PREFIXES = tuple(
+    f"{fn}{sep}".encode("ascii")
+    for fn in ROCKS_DB_FUNCTIONS
+    for sep in (" ", ":")
+)
+ROCKS_DB_FN_INDEX = {fn: i for i, fn in enumerate(ROCKS_DB_FUNCTIONS)}
+# Two summary columns (rate, avg latency) per db_bench function.
+BENCHMARK_HEADER = ",".join(
+    ["run_index", "mem_policy"]
+    + [
+        f"{fn.lower()}_{metric}"
+        for fn in ROCKS_DB_FUNCTIONS
+        for metric in ("rate_ops_s", "avg_ms_ops")
+    ]
+)
+EMPTY_CELLS = ("",) * 2
+SANITIZE_RE = re.compile(r"[^A-Za-z0-9_-]+")
 
 
 def parse_args() -> argparse.Namespace:
@@ -58,7 +86,20 @@ def parse_args() -> argparse.Namespace:
         type=str,
         help=(
             "Sequence of NUMA policies to cycle through. Provide one or more names "
-            "(default: 'default')."
+            f"from {', '.join(POLICY_COMMANDS)} or bind_node<N> "
+            "(default: 'default'). bind_node<N> runs are not one-hot encoded "
+            "by preprocess_rocksdb_log.py."
+        ),
+    )
+    parser.add_argument(
+        "--parallel-nodes",
+        action="store_true",
+        help=(
+            "Run iterations concurrently, one per NUMA node, each bound with "
+            "numactl --cpunodebind/--membind and recorded as bind_node<N>. "
+            "Requires the 'default' policy; each node gets its own db_bench "
+            "database under --output-dir. Runs then share the system-wide "
+            "counters, so only use this when that is acceptable."
         ),
     )
     parser.add_argument(
@@ -92,6 +133,11 @@ def parse_args() -> argparse.Namespace:
         default=Path("rocksdb_logs/raw.csv"),
         help="Destination logs with mem_policy and run index columns.",
     )
+    parser.add_argument(
+        "--compress-raw",
+        action="store_true",
+        help="Gzip the raw aggregate (level 1); '.gz' is added to its name.",
+    )
     parser.add_argument(
         "--aggregate-benchmark-file",
         type=Path,
@@ -101,6 +147,15 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def policy_commands(numa_count: int) -> Dict[str, List[str]]:
+    # Strict per-node binding, one entry per detected node.
+    commands = dict(POLICY_COMMANDS)
+    for node in range(numa_count):
+        commands[f"bind_node{node}"] = [
+            "numactl", f"--cpunodebind={node}", f"--membind={node}"]
+    return commands
+
+
 def flatten_policies(raw_policies: Sequence[str]) -> List[str]:
     policies: List[str] = []
     for entry in raw_policies:
@@ -113,7 +168,7 @@ def flatten_policies(raw_policies: Sequence[str]) -> List[str]:
 
 def build_output_file_suffix(start_run: int, policies: Sequence[str]) -> str:
     def sanitize_label(value: str) -> str:
-        sanitized = re.sub(r"[^A-Za-z0-9_-]+", "_", value).strip("_")
+        sanitized = SANITIZE_RE.sub("_", value).strip("_")
         return sanitized or "policy"
 
     label = "_".join(sanitize_label(policy) for policy in policies)
@@ -128,32 +183,14 @@ def append_suffix_to_path(path: Path, suffix: str) -> Path:
 
 
 def detect_numa_nodes() -> int:
-    command = "ls -d /sys/devices/system/node/node* | wc -l"
-
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            check=True,
-            capture_output=True,
-            text=True
-        )
-        count_str = result.stdout.strip()
-        if not count_str:
-            return 0
-        return int(count_str)
-
-    except subprocess.CalledProcessError as e:
-        print(
-            f"Error running NUMA detection command (Exit Status {e.returncode}):")
-        print(f"Stderr: {e.stderr.strip()}")
-        return None
+        with os.scandir("/sys/devices/system/node") as entries:
+            return sum(
+                1 for entry in entries
+                if entry.name.startswith("node") and entry.name[4:].isdigit()
+            )
     except FileNotFoundError:
-        print("System shell or necessary command ('ls', 'wc') not found.")
-        return None
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        return None
+        return 0
 
 
 def ensure_binaries(db_bench_path: Path, logger_path: Path) -> None:
@@ -187,17 +224,10 @@ def generate_num_intervals(
     if start <= 0 or end <= 0 or start >= end or num_intervals < 2:
         return [start, end]
 
-    # Calculate the step size in logarithmic space
-    log_start = math.log(start)
-    log_end = math.log(end)
-    log_step = (log_end - log_start) / (num_intervals - 1)
-
-    num_list: List[int] = []
-    for i in range(num_intervals):
-        log_value = log_start + i * log_step
-        # Convert back to linear space and round to the nearest integer
-        value = int(round(math.exp(log_value)))
-        num_list.append(value)
+    # Geometric progression, as numpy.geomspace computes it, without going
+    # through log space and back
+    ratio = (end / start) ** (1 / (num_intervals - 1))
+    num_list = [round(start * ratio**i) for i in range(num_intervals)]
 
     num_list[0] = start
     num_list[-1] = end
@@ -208,207 +238,420 @@ def generate_num_intervals(
 def run_benchmark_and_logger(
     run_index: int,
     policy_name: str,
-    interval: float,
-    numa_count: int,
-    db_bench_helper_path: Path,
-    db_bench_num_iter: int,
-    logger_path: Path,
+    logger_cmd: Sequence[str],
     run_dir: Path,
-) -> Tuple[Path, str]:
-    run_dir.mkdir(parents=True, exist_ok=True)
-
-    logger_cmd = [
-        str(logger_path),
-        str(numa_count),
-        str(interval),
-        "-r",
-        str(db_bench_helper_path.resolve()),
-        str(db_bench_num_iter)
-    ]
-
-    print(
-        f"[run {run_index}] policy={policy_name} -> collecting NUMA stats ...",
-        flush=True,
-    )
-
-    result = subprocess.run(
-        logger_cmd,
-        check=True,
-        cwd=run_dir,
-        capture_output=True,
-        text=True,
-    )
-
-    return run_dir / LOGGER_OUTPUT, result.stdout or ""
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[Path, List[Dict[str, float]]]:
+    # main() has already created the parent output directory.
+    os.makedirs(run_dir, exist_ok=True)
+
+    log.info(
+        "[run %d] policy=%s -> collecting NUMA stats ...",
+        run_index, policy_name)
+
+    # stdout goes straight to a file and only its tail is parsed afterwards;
+    # stderr is passed through. Keep this call free of preexec_fn, user,
+    # group and umask arguments: without them CPython (3.10+) launches the
+    # child with vfork instead of copying this process's page tables. cwd
+    # rules out posix_spawn, but it cannot go: a parent-side chdir would race
+    # under --parallel-nodes.
+    bench_output = run_dir / BENCH_OUTPUT
+    with bench_output.open("wb") as out:
+        returncode = subprocess.call(
+            logger_cmd, cwd=run_dir, stdout=out, env=env)
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, logger_cmd)
+
+    results = parse_benchmark_results(
+        summary_lines(bench_output, BENCH_OUTPUT_TAIL))
+    if len(results) < len(ROCKS_DB_FUNCTIONS):
+        # Unusually chatty output; fall back to the whole file.
+        results = parse_benchmark_results(summary_lines(bench_output))
+
+    return run_dir / LOGGER_OUTPUT, results
+
+
+def summary_lines(path: Path, tail: Optional[int] = None) -> List[str]:
+    """
+    Return the db_bench summary lines from the last ``tail`` bytes of
+    ``path`` (the whole file if ``tail`` is None).
+
+    The output is scanned as bytes; only lines starting with a known
+    function name are decoded.
+    """
+    lines: List[str] = []
+    with path.open("rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if not size:
+            return lines
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0 if tail is None else max(0, size - tail)
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    end = size
+                line = mm[pos:end].lstrip()
+                if line.startswith(ROCKS_DB_FN_PREFIXES):
+                    lines.append(line.decode("utf-8", "replace"))
+                pos = end + 1
+    return lines
+
+
+class CsvAppender:
+    """
+    Append-only CSV file kept open for a whole sweep.
+
+    The header is checked against the file's existing one the first time it
+    is supplied and cached afterwards, so later runs never re-read the file.
+    Rows are raw bytes collected in a bytearray and handed to os.write in
+    FLUSH_THRESHOLD-sized chunks, bypassing the file object layers. When the
+    header is known up front it is passed to the constructor and checked
+    there, before any run starts.
+
+    With ``compress`` set each chunk goes through zlib at level 1 and every
+    appender adds one gzip member, so the file stays a valid (multi-member)
+    .gz across sweeps.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        label: str,
+        header: Optional[str] = None,
+        compress: bool = False,
+    ) -> None:
+        self.path = path
+        self.label = label
+        self.header: Optional[str] = None
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._buf = bytearray()
+        self._zlib = (
+            zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            if compress else None
+        )
+        self._fed = False
+        if header is not None:
+            try:
+                self.set_header(header)
+            except RuntimeError:
+                os.close(self._fd)
+                raise
+
+    def set_header(self, header: str) -> None:
+        if header == self.header:
+            return
+
+        existing = self.header
+        if existing is None:
+            existing = self._existing_header()
+            if not existing:
+                # A new file, or a .gz holding only empty members.
+                self._buf += header.encode("utf-8") + b"\n"
+                self.header = header
+                return
+        if existing != header:
+            raise RuntimeError(
+                f"{self.label} header mismatch.\n"
+                f"Existing: {existing}\nExpected: {header}"
+            )
+        self.header = header
+
+    def _existing_header(self) -> str:
+        if os.fstat(self._fd).st_size == 0:
+            return ""
+        opener = gzip.open if self._zlib is not None else open
+        with opener(self.path, "rt", encoding="utf-8") as fh:
+            return fh.readline().rstrip("\n")
+
+    def append_row(self, row: bytes) -> None:
+        self._buf += row
+        if len(self._buf) >= FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        if self._zlib is None:
+            self._write(self._buf)
+        else:
+            self._write(self._zlib.compress(self._buf))
+            self._fed = True
+        self._buf.clear()
+
+    def _write(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            # os.write may write less than asked for.
+            view = view[os.write(self._fd, view):]
+        view.release()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+            # Only finish a gzip member that has content; an empty one
+            # would sit in front of the next sweep's header.
+            if self._fed:
+                self._write(self._zlib.flush())
+        finally:
+            os.close(self._fd)
 
 
 def append_with_metadata(
     run_file: Path,
-    raw_file: Path,
+    raw_appender: CsvAppender,
     policy_name: str,
     run_index: int,
 ) -> None:
     if not run_file.is_file():
         raise FileNotFoundError(f"Expected logger output at {run_file}")
 
-    raw_lines = run_file.read_text(encoding="utf-8").strip().splitlines()
-    if not raw_lines:
-        print(f"[run {run_index}] warning: {run_file} is empty, skipping.")
-        return
-
-    base_header = raw_lines[0]
-    rows = raw_lines[1:]
-    augmented_header = f"{base_header},mem_policy,run_index"
-
-    raw_file.parent.mkdir(parents=True, exist_ok=True)
-    if not raw_file.exists():
-        raw_file.write_text(augmented_header + "\n", encoding="utf-8")
-    else:
-        with raw_file.open("r", encoding="utf-8") as existing:
-            existing_header = existing.readline().rstrip("\n")
-        if existing_header != augmented_header:
-            raise RuntimeError(
-                f"Aggregate header mismatch.\n"
-                f"Existing: {existing_header}\nExpected: {augmented_header}"
-            )
-
-    with raw_file.open("a", encoding="utf-8") as dest:
-        for row in rows:
-            dest.write(f"{row},{policy_name},{run_index}\n")
-
-
-def parse_benchmark_results(db_bench_output: str) -> List[Dict[str, float]]:
+    tail = f",{policy_name},{run_index}\n".encode("utf-8")
+    with run_file.open("rb") as src:
+        size = os.fstat(src.fileno()).st_size
+        if size == 0:
+            log.warning(
+                "[run %d] warning: %s is empty, skipping.", run_index, run_file)
+            return
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b"\n")
+            if header_end < 0:
+                header_end = size
+            base_header = mm[:header_end].strip()
+            if not base_header:
+                log.warning(
+                    "[run %d] warning: %s is empty, skipping.",
+                    run_index, run_file)
+                return
+            raw_appender.set_header(
+                f"{base_header.decode('utf-8')},mem_policy,run_index")
+
+            # Copy one row at a time into the appender's buffer, which
+            # flushes every FLUSH_THRESHOLD bytes, so memory stays bounded
+            # by the buffer rather than the file.
+            pos = header_end + 1
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end < 0:
+                    end = size
+                row = mm[pos:end].rstrip()
+                if row:
+                    raw_appender.append_row(row + tail)
+                pos = end + 1
+
+
+def parse_benchmark_results(lines: Iterable[str]) -> List[Dict[str, float]]:
     rows: List[Dict[str, float]] = []
 
-    lines = [line.strip() for line in db_bench_output.splitlines()]
-
+    # Expects summary lines as picked out by summary_lines, e.g.
+    # "readseq      :  0.123 micros/op 812 ops/sec;".
     for line in lines:
-        # Skip empty lines, separators, and non-data lines (like DB path)
-        if not line or line.startswith("-") or line.startswith("DB path:"):
-            continue
-
-        match = ROCKS_DB_ROW_RE.match(line)
-        if not match:
-            continue
-
-        # Append the structured dictionary, mapping log fields to required keys
-        rows.append(
-            {
+        line = line.strip()
+        function, _, stats = line.partition(":")
+        parts = stats.split()
+        try:
+            if parts[1] != "micros/op" or not parts[3].startswith("ops/sec"):
+                raise ValueError(line)
+            row = {
+                "function": function.rstrip(),
+                "rate": float(parts[2]),
+                "avg": float(parts[0]),
+            }
+        except (IndexError, ValueError):
+            # Unusual layout; let the full pattern decide.
+            match = ROCKS_DB_ROW_RE.match(line)
+            if not match:
+                continue
+            row = {
                 "function": match.group("function"),
                 "rate": float(match.group("rate")),
                 "avg": float(match.group("avg")),
             }
-        )
+
+        rows.append(row)
 
     return rows
 
 
 def append_benchmark_results(
     results: Sequence[Dict[str, float]],
-    csv_path: Path,
+    appender: CsvAppender,
     policy_name: str,
     run_index: int,
 ) -> None:
     if not results:
-        print(
-            f"[run {run_index}] warning: DB_BENCH output missing summary table.")
+        log.warning(
+            "[run %d] warning: DB_BENCH output missing summary table.",
+            run_index)
         return
 
-    header_parts = ["run_index", "mem_policy"]
-    for fn in ROCKS_DB_FUNCTIONS:
-        prefix = fn.lower()
-        header_parts.extend(
-            [
-                f"{prefix}_rate_ops_s",
-                f"{prefix}_avg_ms_ops",
-            ]
-        )
-    header = ",".join(header_parts)
-
-    row_by_function = {row["function"]: row for row in results}
-    missing = [fn for fn in ROCKS_DB_FUNCTIONS if fn not in row_by_function]
+    slots: List[Optional[Dict[str, float]]] = [None] * len(ROCKS_DB_FUNCTIONS)
+    for row in results:
+        index = ROCKS_DB_FN_INDEX.get(row["function"])
+        if index is not None:
+            slots[index] = row
+    missing = [
+        fn for fn, row in zip(ROCKS_DB_FUNCTIONS, slots) if row is None]
     if missing:
-        print(
-            f"[run {run_index}] warning: STREAM output missing entries for: "
-            f"{', '.join(missing)}"
-        )
-
-    csv_path.parent.mkdir(parents=True, exist_ok=True)
-    if not csv_path.exists():
-        csv_path.write_text(header + "\n", encoding="utf-8")
-    else:
-        with csv_path.open("r", encoding="utf-8") as fh:
-            existing_header = fh.readline().rstrip("\n")
-        if existing_header != header:
-            raise RuntimeError(
-                f"STREAM metrics header mismatch.\n"
-                f"Existing: {existing_header}\nExpected: {header}"
-            )
-
-    row_values: List[str] = [str(run_index), policy_name]
-    for fn in ROCKS_DB_FUNCTIONS:
-        row = row_by_function.get(fn)
-        if not row:
-            row_values.extend(["", "", "", ""])
+        log.warning(
+            "[run %d] warning: DB_BENCH output missing entries for: %s",
+            run_index, ", ".join(missing))
+
+    cells: List[str] = [str(run_index), policy_name]
+    for row in slots:
+        if row is None:
+            cells.extend(EMPTY_CELLS)
             continue
-        row_values.extend(
-            [
-                f"{row['rate']:.6f}",
-                f"{row['avg']:.9f}",
-            ]
-        )
+        cells.append(format(row["rate"], ".6f"))
+        cells.append(format(row["avg"], ".9f"))
 
-    with csv_path.open("a", encoding="utf-8") as fh:
-        fh.write(",".join(row_values) + "\n")
+    appender.append_row((",".join(cells) + "\n").encode("utf-8"))
 
 
 def main() -> int:
     args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
     ensure_binaries(args.db_bench_binary, args.logger_binary)
     policies = flatten_policies(args.policies)
-    suffix = build_output_file_suffix(args.start_run, policies)
+    if args.parallel_nodes and set(policies) != {"default"}:
+        # The per-node binding would override (or be overridden by) any
+        # other policy, so the recorded label would be wrong.
+        log.error("--parallel-nodes only supports the 'default' policy.")
+        return 1
+
+    numa_nodes = detect_numa_nodes()
+    if not numa_nodes:
+        log.error(
+            "Failed to detect NUMA topology: no nodes under "
+            "/sys/devices/system/node")
+        return 1
+
+    if args.parallel_nodes:
+        # Runs are recorded under the binding they actually ran with.
+        suffix = build_output_file_suffix(
+            args.start_run, [f"bind_node{node}" for node in range(numa_nodes)])
+    else:
+        suffix = build_output_file_suffix(args.start_run, policies)
 
     raw_file = append_suffix_to_path(args.raw_file, suffix).resolve()
+    if args.compress_raw:
+        raw_file = raw_file.with_name(raw_file.name + ".gz")
     aggregate_benchmark_file = append_suffix_to_path(
         args.aggregate_benchmark_file, suffix).resolve()
 
-    try:
-        numa_nodes = detect_numa_nodes()
-    except RuntimeError as e:
-        print(f"Failed to detect NUMA topology: {e}", file=sys.stderr)
-        return 1
-
-    print(
-        f"Detected {numa_nodes} NUMA nodes. "
-        f"Running {args.runs} STREAM iterations starting at run {args.start_run}.",
-        flush=True,
-    )
+    policy_cmds = policy_commands(numa_nodes)
+    for policy in dict.fromkeys(policies):
+        if policy not in policy_cmds:
+            # e.g. the Makefile targets, which apply numactl around make.
+            log.warning(
+                "warning: no command for policy '%s'; its runs inherit the "
+                "current NUMA policy.", policy)
+
+    bound = [
+        policy for policy in dict.fromkeys(policies)
+        if policy.startswith("bind_node")
+    ]
+    if args.parallel_nodes:
+        bound = [f"bind_node{node}" for node in range(numa_nodes)]
+    if bound:
+        # preprocess_rocksdb_log.py only one-hot encodes the POLICY_COMMANDS
+        # style policies.
+        log.warning(
+            "warning: %s runs have no policy one-hot encoding in "
+            "preprocess_rocksdb_log.py; they are only told apart by "
+            "mem_policy.", ", ".join(bound))
+
+    log.info(
+        "Detected %d NUMA nodes. Running %d STREAM iterations starting at "
+        "run %d.", numa_nodes, args.runs, args.start_run)
 
     db_bench_num_iter = generate_num_intervals(args.runs)
-
-    for offset in range(args.runs):
+    # Resolved once: the children run inside their run directory, so these
+    # must be absolute.
+    helper_path = str(
+        args.db_bench_helper_script.expanduser().resolve(strict=True))
+    logger_path = str(args.logger_binary.expanduser().resolve(strict=True))
+    output_dir = args.output_dir.resolve()
+    # Only the db_bench iteration count changes between runs.
+    logger_prefix = (
+        logger_path, str(numa_nodes), str(args.interval), "-r", helper_path)
+    bind_cmds = [
+        policy_cmds[f"bind_node{node}"] for node in range(numa_nodes)]
+    for directory in {output_dir, raw_file.parent,
+                      aggregate_benchmark_file.parent}:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    # Both outputs stay open for the whole sweep and are flushed on close.
+    raw_appender = CsvAppender(
+        raw_file, "Aggregate", compress=args.compress_raw)
+    benchmark_appender = CsvAppender(
+        aggregate_benchmark_file, "DB_BENCH metrics", BENCHMARK_HEADER)
+    append_lock = threading.Lock()
+    failed = threading.Event()
+
+    def run_one(offset: int, bind_node: Optional[int] = None) -> None:
         run_index = args.start_run + offset
-        policy_name = policies[(run_index - 1) % len(policies)]
-        run_dir = args.output_dir / f"run_{run_index:02d}"
-
-        run_csv_path, db_bench_stdout = run_benchmark_and_logger(
-            run_index,
-            policy_name,
-            args.interval,
-            numa_nodes,
-            args.db_bench_helper_script.expanduser(),
-            db_bench_num_iter[offset],
-            args.logger_binary.expanduser(),
-            run_dir,
+        run_dir = output_dir / f"run_{run_index:02d}"
+
+        env = None
+        if bind_node is None:
+            policy_name = policies[(run_index - 1) % len(policies)]
+            policy_cmd = policy_cmds.get(policy_name, ())
+        else:
+            policy_name = f"bind_node{bind_node}"
+            policy_cmd = bind_cmds[bind_node]
+            # Concurrent db_bench runs must not share (and destroy) the
+            # default database; benchmark_script.sh passes this as --db.
+            env = dict(
+                os.environ,
+                DB_BENCH_DB=str(output_dir / f"db_node{bind_node}"),
+            )
+        logger_cmd = (
+            *policy_cmd,
+            *logger_prefix,
+            str(db_bench_num_iter[offset]),
         )
-        append_with_metadata(run_csv_path.resolve(),
-                             raw_file, policy_name, run_index)
-        benchmark_results = parse_benchmark_results(db_bench_stdout)
-        append_benchmark_results(
-            benchmark_results, aggregate_benchmark_file, policy_name, run_index)
 
-    print(f"All runs complete. Raw CSV: {raw_file}")
+        run_csv_path, benchmark_results = run_benchmark_and_logger(
+            run_index, policy_name, logger_cmd, run_dir, env)
+        with append_lock:
+            append_with_metadata(
+                run_csv_path, raw_appender, policy_name, run_index)
+            append_benchmark_results(
+                benchmark_results, benchmark_appender, policy_name, run_index)
+
+    def run_node_group(node: int) -> None:
+        # Each node works through its own share of the runs serially, so
+        # concurrent runs never share a node. A failure on any node stops
+        # the others after their current run.
+        for offset in range(node, args.runs, numa_nodes):
+            if failed.is_set():
+                return
+            try:
+                run_one(offset, node)
+            except BaseException:
+                failed.set()
+                raise
+
+    try:
+        if args.parallel_nodes:
+            # Workers only wait on subprocesses, so threads are enough and
+            # they can share the open appenders.
+            with ThreadPoolExecutor(max_workers=numa_nodes) as pool:
+                groups = [
+                    pool.submit(run_node_group, node)
+                    for node in range(numa_nodes)
+                ]
+                for group in groups:
+                    group.result()
+        else:
+            for offset in range(args.runs):
+                run_one(offset)
+    finally:
+        raw_appender.close()
+        benchmark_appender.close()
+
+    log.info("All runs complete. Raw CSV: %s", raw_file)
     return 0
 
 
@@ -0,0 +1,64 @@
+"""
+Parity checks for the preprocessing scripts.
+
+Each fixture under fixtures/ is a raw aggregate log with blank cells placed in
+the middle, first and last samples of runs; the *_blank_run variants also
+leave a counter blank for a whole run. The *_expected.csv files are the
+output of the original groupby-based preprocessors on the same input, so the
+numba kernel has to reproduce their NaN-skipping first/last/min/max/std.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+pytest.importorskip("numba")
+
+DATA_COLLECTION = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+SCRIPTS = {
+    "stream": (
+        DATA_COLLECTION / "STREAM" / "preprocess_stream_log.py",
+        ("--input_csv", "--output_csv"),
+    ),
+    "rocksdb": (
+        DATA_COLLECTION / "rocksdb" / "preprocess_rocksdb_log.py",
+        ("--input-csv", "--output-csv"),
+    ),
+}
+CASES = [
+    (*SCRIPTS[name], f"{name}_{variant}")
+    for name in SCRIPTS
+    for variant in ("nan", "blank_run")
+]
+
+
+@pytest.mark.parametrize("script, flags, fixture", CASES)
+def test_matches_baseline(tmp_path, script, flags, fixture):
+    output = tmp_path / f"{fixture}.csv"
+    input_flag, output_flag = flags
+    subprocess.run(
+        [
+            sys.executable,
+            str(script),
+            input_flag,
+            str(FIXTURES / f"{fixture}.csv"),
+            output_flag,
+            str(output),
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+    expected = pd.read_csv(FIXTURES / f"{fixture}_expected.csv")
+    actual = pd.read_csv(output)
+    # Usage is computed in float32 now, hence the tolerance.
+    pd.testing.assert_frame_equal(
+        actual, expected, check_dtype=False, rtol=1e-5)
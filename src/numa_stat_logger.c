@@ -1,3 +1,5 @@
+#include <errno.h>
+#include <poll.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
@@ -235,9 +237,123 @@ void write_csv_header(const char* filename, int numa_count) {
     fclose(fp);
 }
 
+static void write_sample(FILE* fp, int numa_count,
+    struct node_meminfo* nm,
+    struct node_vmstat* nv,
+    struct sys_vmstat* sv)
+{
+    char meminfo_path[128], vmstat_path[128];
+
+    // --- Parse all nodes ---
+    for (int i = 0; i < numa_count; i++) {
+        snprintf(meminfo_path, sizeof(meminfo_path),
+            "/sys/devices/system/node/node%d/meminfo", i);
+        parse_node_meminfo(&nm[i], meminfo_path, i);
+
+        snprintf(vmstat_path, sizeof(vmstat_path),
+            "/sys/devices/system/node/node%d/vmstat", i);
+        parse_node_vmstat(&nv[i], vmstat_path);
+    }
+    parse_sys_vmstat(sv, "/proc/vmstat");
+
+    // --- Write CSV row ---
+    struct timespec ts;
+    clock_gettime(CLOCK_REALTIME, &ts);
+    fprintf(fp, "%ld.%09ld", ts.tv_sec, ts.tv_nsec);
+
+    for (int i = 0; i < numa_count; i++)
+        fprintf(fp, ",%u,%u", nm[i].mem_total, nm[i].mem_used);
+
+    for (int i = 0; i < numa_count; i++)
+        fprintf(fp, ",%u,%u,%u,%u,%u,%u,%u",
+            nv[i].nr_free_pages, nv[i].numa_hit, nv[i].numa_miss,
+            nv[i].numa_foreign, nv[i].numa_interleave,
+            nv[i].numa_local, nv[i].numa_other);
+
+    fprintf(fp, ",%u,%u,%u,%u,%u,%u,%u,%u\n",
+        sv->numa_pte_updates, sv->numa_huge_pte_updates, sv->numa_pages_migrated,
+        sv->pgmigrate_success, sv->pgmigrate_fail,
+        sv->thp_migration_success, sv->thp_migration_fail, sv->thp_migration_split);
+
+    fflush(fp);
+}
+
+/*
+ * Persistent mode: stay alive across benchmark runs and take commands on
+ * stdin, one per line:
+ *   run <id>  start logging into numa_stat_log_run_<id>.csv
+ *   end       stop logging and close the current run's CSV
+ * Each command is acknowledged with "ok" (or "error") on stdout so the
+ * driver knows when a run's CSV is complete. EOF on stdin exits.
+ */
+static int run_persistent(int numa_count, double interval_sec,
+    struct node_meminfo* nm,
+    struct node_vmstat* nv)
+{
+    struct sys_vmstat sv;
+    struct pollfd pfd = { .fd = STDIN_FILENO, .events = POLLIN };
+    int timeout_ms = (int)(interval_sec * 1000);
+    char line[256], csv_file[128];
+    FILE* fp = NULL;
+
+    // Unbuffered stdin keeps poll() and fgets() in agreement about what
+    // has been read.
+    setvbuf(stdin, NULL, _IONBF, 0);
+    printf("ready\n");
+    fflush(stdout);
+
+    for (;;) {
+        if (fp) {
+            write_sample(fp, numa_count, nm, nv, &sv);
+
+            int ready = poll(&pfd, 1, timeout_ms);
+            if (ready < 0) {
+                if (errno == EINTR)
+                    continue;
+                perror("poll");
+                break;
+            }
+            if (ready == 0)
+                continue; // no command, take the next sample
+        }
+
+        if (!fgets(line, sizeof(line), stdin))
+            break; // driver closed the pipe
+
+        long run_id;
+        if (sscanf(line, "run %ld", &run_id) == 1) {
+            if (fp)
+                fclose(fp);
+            snprintf(csv_file, sizeof(csv_file),
+                "numa_stat_log_run_%ld.csv", run_id);
+            write_csv_header(csv_file, numa_count);
+            fp = fopen(csv_file, "a");
+            if (!fp)
+                perror("fopen append");
+            printf(fp ? "ok\n" : "error\n");
+        }
+        else if (strncmp(line, "end", 3) == 0) {
+            if (fp) {
+                fclose(fp);
+                fp = NULL;
+            }
+            printf("ok\n");
+        }
+        else {
+            fprintf(stderr, "Unknown command: %s", line);
+            printf("error\n");
+        }
+        fflush(stdout);
+    }
+
+    if (fp)
+        fclose(fp);
+    return 0;
+}
+
 int main(int argc, char* argv[]) {
     if (argc < 4) {
-        fprintf(stderr, "Usage: %s <numa_count> <interval_sec> (-d <duration_sec> | -r <command> [args...])\n", argv[0]);
+        fprintf(stderr, "Usage: %s <numa_count> <interval_sec> (-d <duration_sec> | -r <command> [args...] | --persistent)\n", argv[0]);
         return 1;
     }
 
@@ -256,6 +372,7 @@ int main(int argc, char* argv[]) {
     int use_duration = 0;
     int duration_sec = 0;
     int use_run = 0;
+    int use_persistent = 0;
     char** run_argv = NULL;
 
     // parse mode
@@ -279,6 +396,9 @@ int main(int argc, char* argv[]) {
         use_run = 1;
         run_argv = &argv[4]; // points to command + args
     }
+    else if (strcmp(argv[3], "--persistent") == 0) {
+        use_persistent = 1;
+    }
     else {
         fprintf(stderr, "Unknown mode: %s\n", argv[3]);
         return 1;
@@ -299,6 +419,12 @@ int main(int argc, char* argv[]) {
         return 1;
     }
 
+    if (use_persistent) {
+        int ret = run_persistent(numa_count, interval_sec, nm, nv);
+        free(nm); free(nv);
+        return ret;
+    }
+
     const char* csv_file = "numa_stat_log.csv";
     write_csv_header(csv_file, numa_count);
 
@@ -313,6 +439,11 @@ int main(int argc, char* argv[]) {
     int status = 0;
     if (use_run) {
         child_pid = fork();
+        if (child_pid < 0) {
+            perror("fork");
+            fclose(fp); free(nm); free(nv);
+            return 1;
+        }
         if (child_pid == 0) {
             // child: run the command
             execvp(run_argv[0], run_argv);
@@ -322,41 +453,8 @@ int main(int argc, char* argv[]) {
         // parent continues to log
     }
 
-    char meminfo_path[128], vmstat_path[128];
-
     for (int iter = 0; use_duration ? (iter < iterations) : 1; iter++) {
-        // --- Parse all nodes ---
-        for (int i = 0; i < numa_count; i++) {
-            snprintf(meminfo_path, sizeof(meminfo_path),
-                "/sys/devices/system/node/node%d/meminfo", i);
-            parse_node_meminfo(&nm[i], meminfo_path, i);
-
-            snprintf(vmstat_path, sizeof(vmstat_path),
-                "/sys/devices/system/node/node%d/vmstat", i);
-            parse_node_vmstat(&nv[i], vmstat_path);
-        }
-        parse_sys_vmstat(&sv, "/proc/vmstat");
-
-        // --- Write CSV row ---
-        struct timespec ts;
-        clock_gettime(CLOCK_REALTIME, &ts);
-        fprintf(fp, "%ld.%09ld", ts.tv_sec, ts.tv_nsec);
-
-        for (int i = 0; i < numa_count; i++)
-            fprintf(fp, ",%u,%u", nm[i].mem_total, nm[i].mem_used);
-
-        for (int i = 0; i < numa_count; i++)
-            fprintf(fp, ",%u,%u,%u,%u,%u,%u,%u",
-                nv[i].nr_free_pages, nv[i].numa_hit, nv[i].numa_miss,
-                nv[i].numa_foreign, nv[i].numa_interleave,
-                nv[i].numa_local, nv[i].numa_other);
-
-        fprintf(fp, ",%u,%u,%u,%u,%u,%u,%u,%u\n",
-            sv.numa_pte_updates, sv.numa_huge_pte_updates, sv.numa_pages_migrated,
-            sv.pgmigrate_success, sv.pgmigrate_fail,
-            sv.thp_migration_success, sv.thp_migration_fail, sv.thp_migration_split);
-
-        fflush(fp);
+        write_sample(fp, numa_count, nm, nv, &sv);
 
         // Sleep interval
         struct timespec ts_sleep = { 0, (long)(interval_sec * 1e9) };
@@ -365,18 +463,28 @@ int main(int argc, char* argv[]) {
         // Stop condition for run-executable mode
         if (use_run) {
             pid_t ret = waitpid(child_pid, &status, WNOHANG);
-            if (ret != 0)
-                break; // child finished
+            if (ret != 0) {
+                child_pid = -1; // child finished and reaped
+                break;
+            }
         }
     }
 
     // If run mode and child still exists, wait for it
-    if (use_run)
+    if (use_run && child_pid > 0)
         waitpid(child_pid, &status, 0);
 
     fclose(fp);
     free(nm);
     free(nv);
 
+    // Report the benchmark's outcome as our own exit status
+    if (use_run) {
+        if (WIFEXITED(status))
+            return WEXITSTATUS(status);
+        if (WIFSIGNALED(status))
+            return 128 + WTERMSIG(status);
+        return 1;
+    }
     return 0;
 }